@@ -1,15 +1,22 @@
 import imaplib
-import email
 import os
 import sys
 import datetime
 import argparse
-import hashlib
+import base64
+import itertools
 import json
+import queue
+import quopri
 import re
+from concurrent.futures import ThreadPoolExecutor
 from email.header import decode_header
+from email.parser import BytesFeedParser
 from email.utils import parseaddr
-from bs4 import BeautifulSoup
+from urllib.parse import parse_qs, urlparse
+import orjson
+import xxhash
+from selectolax.lexbor import LexborHTMLParser
 
 # Try to import scholar_api for enhancement
 try:
@@ -24,66 +31,139 @@ except ImportError:
         print("Warning: scholar_api module not found. Skipping SerpApi enhancement.")
         SCHOLAR_API_AVAILABLE = False
 
-def get_md5(text):
-    return hashlib.md5(text.encode('utf-8')).hexdigest()
+# UID FETCH batch size; round-trip savings flatten out past ~100 messages
+_FETCH_BATCH_SIZE = 50
+_FETCH_TOKEN_RE = re.compile(rb'''\s*(?:
+    (?P<open>\()
+  | (?P<close>\))
+  | "(?P<quoted>(?:[^"\\]|\\.)*)"
+  | \{(?P<literal>\d+)\}\s*$
+  | (?P<atom>[^\s()"\[{]+(?:\[[^\]]*\][^\s()"]*)?)
+)''', re.VERBOSE)
+_QUOTED_ESCAPE_RE = re.compile(rb'\\(.)')
+# Fetched batches buffered ahead of the parser pool
+_FETCH_QUEUE_SIZE = 4
+# Papers parsed from each alert on earlier runs, keyed by Message-ID
+_DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "scholar_alerts", "parsed.json")
+# Alerts already saved on earlier runs, keyed by account/mailbox/UIDVALIDITY/UID
+_DEFAULT_PROCESSED_PATH = os.path.join(os.path.expanduser("~"), ".cache", "scholar_alerts", "processed_uids.json")
+# Bump when the shape of cached papers (e.g. the id scheme) changes
+_PARSED_CACHE_VERSION = 4
+# Cached alerts not seen by any run for this many days are dropped
+_PARSED_CACHE_MAX_AGE_DAYS = 7
+# IMAP dates always use English month names, whatever the locale
+_IMAP_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+def get_xxh3(text):
+    # Identity hash only, so a fast non-cryptographic hash is enough
+    return xxhash.xxh3_64_hexdigest(text.encode('utf-8'))
+
+def _paper_id(title, author_list):
+    # Streaming the parts gives the same digest as hashing title + ''.join(author_list)
+    hasher = xxhash.xxh3_64()
+    hasher.update(title.encode('utf-8'))
+    for author in author_list:
+        hasher.update(author.encode('utf-8'))
+    return f"scholar_{hasher.hexdigest()}"
 
 def clean_text(text):
     if not text:
         return ""
     # Remove extra whitespace and newlines
-    return re.sub(r'\s+', ' ', text).strip()
+    return ' '.join(text.split())
 
-def parse_scholar_email(html_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
-    papers = []
-    
+def _group_h3_siblings(h3_nodes):
+    """Map each h3 to the sibling nodes that follow it, up to the next h3 or hr.
+
+    Every parent's children are walked once, rather than walking forward from
+    each h3 separately.
+    """
+    following = {}
+    visited_parents = set()
+    for h3 in h3_nodes:
+        parent = h3.parent
+        if parent is None or parent in visited_parents:
+            continue
+        visited_parents.add(parent)
+        current = None
+        for child in parent.iter(include_text=True):
+            if child.tag == 'h3':
+                current = following.setdefault(child, [])
+            elif child.tag == 'hr':
+                current = None
+            elif current is not None:
+                current.append(child)
+    return following
+
+def _resolve_scholar_url(url):
+    """Return the target of a scholar_url redirect link, or url unchanged."""
+    if not url:
+        return url
+    parsed = urlparse(url)
+    if not parsed.path.endswith('/scholar_url'):
+        return url
+    return parse_qs(parsed.query).get('url', [url])[0]
+
+def _category_from_link(a_tag):
+    cat_text = clean_text(a_tag.text())
+    # Remove brackets if present (e.g., "[learned "cost model"]")
+    if cat_text.startswith('[') and cat_text.endswith(']'):
+        cat_text = cat_text[1:-1].strip()
+    return cat_text
+
+def _extract_category(tree):
     # Extract category from footer
     # Pattern: "Google 学术搜索发送此邮件，是因为您关注了 <a ...>XXX</a> 的新搜索结果"
     # We look for the text "Google 学术搜索发送此邮件，是因为您关注了"
-    category = "Google Scholar" # Default
-    
-    # Try to find the specific text node
     target_text = "Google 学术搜索发送此邮件，是因为您关注了"
-    found_category = False
     
-    # Search in 'p' tags
-    for p in soup.find_all('p'):
-        p_text = p.get_text()
-        if target_text in p_text:
+    # The alert name links to the alerts page, so only look at those links
+    # instead of the text of every paragraph
+    for a_tag in tree.css('a[href*="scholar_alerts"]'):
+        parent = a_tag.parent
+        if parent is not None and target_text in parent.text():
+            cat_text = _category_from_link(a_tag)
+            if cat_text:
+                return cat_text
+    
+    # Fall back to scanning 'p' tags, starting from the footer
+    for p in reversed(tree.css('p')):
+        if target_text in p.text():
             # Found the paragraph. Now we need to extract the link text.
-            a_tag = p.find('a')
+            a_tag = p.css_first('a')
             if a_tag:
-                cat_text = clean_text(a_tag.get_text())
-                # Remove brackets if present (e.g., "[learned "cost model"]")
-                if cat_text.startswith('[') and cat_text.endswith(']'):
-                    cat_text = cat_text[1:-1].strip()
-                
+                cat_text = _category_from_link(a_tag)
                 if cat_text:
-                    category = cat_text
-                    found_category = True
-                    break
+                    return cat_text
+    
+    return "Google Scholar" # Default
+
+def parse_scholar_email(html_content):
+    tree = LexborHTMLParser(html_content)
+    papers = []
+    category = _extract_category(tree)
     
     # Strategy: Look for the specific structure of Google Scholar alerts
     # Usually: <h3><a ...>Title</a></h3>
     
-    for h3 in soup.find_all('h3'):
-        a_tag = h3.find('a')
+    h3_nodes = tree.css('h3')
+    h3_siblings = _group_h3_siblings(h3_nodes)
+    for h3 in h3_nodes:
+        a_tag = h3.css_first('a')
         if not a_tag:
             continue
             
-        title = clean_text(a_tag.get_text())
-        url = a_tag.get('href')
+        title = clean_text(a_tag.text())
+        scholar_redirect = a_tag.attributes.get('href')
         
         # Google Scholar redirect URL usually looks like:
         # https://scholar.google.com/scholar_url?url=...
-        # We can try to extract the real URL if needed, or just use the redirect.
-        # Keeping the redirect is safer as it might be authenticated or tracked, 
-        # but for direct access, the real URL is better.
-        # Let's keep the original URL for now.
+        # Link to the real URL so readers don't go through the redirect,
+        # but keep the original one alongside it.
+        url = _resolve_scholar_url(scholar_redirect)
         
         # Authors and snippet
         # They are usually in a div following the h3
-        container = h3.parent
         
         # Try to find author div (class 'g-s-a' is common in web, email might vary)
         # We look for the first text node or div after h3
@@ -91,11 +171,10 @@ def parse_scholar_email(html_content):
         authors_text = ""
         abstract_text = ""
         
-        # Iterate siblings
-        curr = h3.next_sibling
-        while curr:
-            if curr.name == 'div':
-                txt = clean_text(curr.get_text())
+        # Iterate siblings up to the next item or separator
+        for curr in h3_siblings.get(h3, ()):
+            if curr.tag == 'div':
+                txt = clean_text(curr.text())
                 if not authors_text:
                     authors_text = txt
                 else:
@@ -103,17 +182,12 @@ def parse_scholar_email(html_content):
                     if txt and len(txt) > 20: # Simple heuristic
                         abstract_text = txt
                         break
-            elif curr.name is None: # Text node
-                txt = clean_text(str(curr))
+            elif curr.tag == '-text': # Text node
+                txt = clean_text(curr.text_content)
                 if txt:
                     if not authors_text:
                         authors_text = txt
             
-            if curr.name in ['h3', 'hr']: # Stop at next item or separator
-                break
-                
-            curr = curr.next_sibling
-            
         # Clean authors
         # Format often: "Author1, Author2... - Journal, Year - Publisher"
         authors_clean = authors_text
@@ -123,7 +197,7 @@ def parse_scholar_email(html_content):
         author_list = [a.strip() for a in authors_clean.split(',') if a.strip()]
         
         # Generate ID
-        paper_id = f"scholar_{get_md5(title + ''.join(author_list))}"
+        paper_id = _paper_id(title, author_list)
         
         # Construct summary for AI
         # If abstract is present, use it. If not, construct a prompt-like summary.
@@ -144,6 +218,7 @@ def parse_scholar_email(html_content):
             "categories": [category],
             "pdf": url, 
             "abs": url,
+            "scholar_redirect": scholar_redirect,
             "comment": "From Google Scholar Alert",
             "source": "Google Scholar"
         })
@@ -154,8 +229,7 @@ def _parse_ymd_date(value):
     return datetime.date.fromisoformat(value.strip())
 
 def _format_imap_date(value):
-    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    return f"{value.day:02d}-{months[value.month - 1]}-{value.year:04d}"
+    return f"{value.day:02d}-{_IMAP_MONTHS[value.month - 1]}-{value.year:04d}"
 
 def _resolve_imap_host(email_user, imap_host):
     if imap_host:
@@ -194,6 +268,280 @@ def _is_target_sender(msg, from_address):
     except Exception:
         return False
 
+def _tokenize_fetch_response(msg_data):
+    """Yield tokens from an imaplib FETCH response.
+
+    Parentheses come back as '(' / ')' strings, atoms and quoted strings as
+    bytes (NIL as None) and literals as the raw bytes imaplib read for them.
+    """
+    for item in msg_data:
+        if isinstance(item, tuple):
+            text, literal = item[0], item[1]
+        else:
+            text, literal = item, None
+        pos = 0
+        while pos < len(text):
+            match = _FETCH_TOKEN_RE.match(text, pos)
+            if not match:
+                if text[pos:].strip():
+                    raise ValueError(f"Unexpected FETCH response data: {text[pos:pos + 40]!r}")
+                break
+            pos = match.end()
+            if match.group('open'):
+                yield '('
+            elif match.group('close'):
+                yield ')'
+            elif match.group('quoted') is not None:
+                yield _QUOTED_ESCAPE_RE.sub(rb'\1', match.group('quoted'))
+            elif match.group('atom'):
+                atom = match.group('atom')
+                yield None if atom.upper() == b'NIL' else atom
+        if literal is not None:
+            yield literal
+
+def _parse_fetch_response(msg_data):
+    """Parse a UID FETCH response into {uid: {item name: value}}.
+
+    Item names are upper-cased (e.g. b'BODYSTRUCTURE', b'BODY[2]') and
+    parenthesised values become nested lists.
+    """
+    stack = [[]]
+    for token in _tokenize_fetch_response(msg_data):
+        if token == '(':
+            stack.append([])
+        elif token == ')':
+            if len(stack) > 1:
+                done = stack.pop()
+                stack[-1].append(done)
+        else:
+            stack[-1].append(token)
+
+    results = {}
+    for value in stack[0]:
+        # Each response is "<seq> (<name> <value> ...)"; skip the sequence numbers
+        if not isinstance(value, list):
+            continue
+        attrs = {}
+        for name, item in zip(value[::2], value[1::2]):
+            if isinstance(name, bytes):
+                attrs[name.upper()] = item
+        uid = attrs.get(b'UID')
+        if uid:
+            results[uid] = attrs
+    return results
+
+def _body_item(attrs):
+    """Return the value of the (single) BODY[...] item of a FETCH response."""
+    for name, value in attrs.items():
+        if name.startswith(b'BODY['):
+            return value
+    return None
+
+def _find_html_part(structure, section=""):
+    """Locate the first text/html part in a parsed BODYSTRUCTURE.
+
+    Returns (section, transfer encoding, charset) or None.
+    """
+    if not isinstance(structure, list) or not structure:
+        return None
+    if isinstance(structure[0], list):
+        # Multipart: child parts come first, followed by the subtype
+        children = itertools.takewhile(lambda part: isinstance(part, list), structure)
+        for i, child in enumerate(children, 1):
+            found = _find_html_part(child, f"{section}.{i}" if section else str(i))
+            if found:
+                return found
+        return None
+    if len(structure) < 6 or not isinstance(structure[0], bytes) or not isinstance(structure[1], bytes):
+        return None
+    if structure[0].lower() != b'text' or structure[1].lower() != b'html':
+        return None
+    params = structure[2] if isinstance(structure[2], list) else []
+    charset = None
+    for name, value in zip(params[::2], params[1::2]):
+        if isinstance(name, bytes) and name.lower() == b'charset':
+            charset = value
+    # A single-part message has no part number; its body is the TEXT section
+    return section or "TEXT", structure[5], charset
+
+def _parse_headers(raw_headers):
+    # BytesFeedParser avoids the legacy Parser's slow path on large inputs
+    parser = BytesFeedParser()
+    parser.feed(raw_headers)
+    return parser.close()
+
+def _decode_part(payload, encoding, charset):
+    encoding = (encoding or b'').lower()
+    if encoding == b'quoted-printable':
+        payload = quopri.decodestring(payload)
+    elif encoding == b'base64':
+        payload = base64.b64decode(payload)
+    try:
+        return payload.decode((charset or b'utf-8').decode('ascii', errors='ignore'), errors='ignore')
+    except LookupError:
+        return payload.decode(errors='ignore')
+
+def _load_parsed_cache(cache_path):
+    """Load {cache key: {"parsed_at": "YYYY-MM-DD", "papers": [...]}}."""
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable parse cache {cache_path}: {e}")
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _PARSED_CACHE_VERSION:
+        print(f"Ignoring parse cache {cache_path} written by an older version.")
+        return {}
+    return data.get("alerts", {})
+
+def _save_parsed_cache(cache_path, cache):
+    if not cache_path:
+        return
+    try:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": _PARSED_CACHE_VERSION, "alerts": cache}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: failed to save parse cache {cache_path}: {e}")
+
+def _load_processed_uids(processed_path):
+    """Load {"<account>/<mailbox>/<uidvalidity>/<uid>": {"output": path, "ids": [...]}}."""
+    if not processed_path or not os.path.exists(processed_path):
+        return {}
+    try:
+        with open(processed_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable processed UID list {processed_path}: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def _save_processed_uids(processed_path, processed):
+    if not processed_path:
+        return
+    try:
+        os.makedirs(os.path.dirname(processed_path) or ".", exist_ok=True)
+        tmp_path = f"{processed_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(processed, f, ensure_ascii=False)
+        os.replace(tmp_path, processed_path)
+    except OSError as e:
+        print(f"Warning: failed to save processed UID list {processed_path}: {e}")
+
+def _read_paper_ids(path):
+    ids = set()
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    ids.add(orjson.loads(line).get("id"))
+                except (orjson.JSONDecodeError, AttributeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return ids
+
+def _already_saved(entry, saved_ids_by_path):
+    # An alert only counts as done while the file it was written to still holds
+    # its papers; the ids of each recorded file are read once and cached
+    output = entry.get("output") if entry else None
+    if not output:
+        return False
+    if output not in saved_ids_by_path:
+        saved_ids_by_path[output] = _read_paper_ids(output) if os.path.exists(output) else None
+    saved_ids = saved_ids_by_path[output]
+    return saved_ids is not None and saved_ids.issuperset(entry.get("ids", []))
+
+def _fetch_html_parts(mail, uids, from_address, parsed_cache):
+    """Fetch only the text/html part of the scholar alerts among uids.
+
+    A first FETCH reads BODYSTRUCTURE and the From/Message-ID headers, then
+    the HTML part of each alert is fetched with BODY.PEEK (grouped by
+    section), so the text/plain alternative is never downloaded. Alerts whose
+    Message-ID is already in parsed_cache are not downloaded at all.
+    Returns a list of (uid, cache_key, payload, encoding, charset) with
+    payload None when there is nothing to parse; messages from other senders
+    are left out.
+    """
+    typ, msg_data = mail.uid('FETCH', b','.join(uids), '(BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS (FROM MESSAGE-ID)])')
+    if typ != "OK" or not msg_data:
+        return []
+    structures = _parse_fetch_response(msg_data)
+
+    html_parts = {}
+    cache_keys = {}
+    sections = {}
+    for uid in uids:
+        attrs = structures.get(uid)
+        if not attrs:
+            continue
+        msg = _parse_headers(_body_item(attrs) or b'')
+        if not _is_target_sender(msg, from_address):
+            continue
+        cache_key = (msg.get("Message-ID") or "").strip() or None
+        cache_keys[uid] = cache_key
+        part = _find_html_part(attrs.get(b'BODYSTRUCTURE'))
+        html_parts[uid] = part
+        if part and cache_key not in parsed_cache:
+            sections.setdefault(part[0], []).append(uid)
+
+    payloads = {}
+    for section, section_uids in sections.items():
+        typ, msg_data = mail.uid('FETCH', b','.join(section_uids), f'(BODY.PEEK[{section}])')
+        if typ != "OK" or not msg_data:
+            continue
+        for uid, attrs in _parse_fetch_response(msg_data).items():
+            payloads[uid] = _body_item(attrs)
+
+    items = []
+    for uid, part in html_parts.items():
+        if part and payloads.get(uid):
+            items.append((uid, cache_keys[uid], payloads[uid], part[1], part[2]))
+        else:
+            items.append((uid, cache_keys[uid], None, None, None))
+    return items
+
+def _fetch_batches(mail, msg_ids, from_address, parsed_cache, out_queue):
+    """Producer: fetch the HTML parts of msg_ids in batches onto out_queue, then a None sentinel."""
+    try:
+        for batch in itertools.batched(msg_ids, _FETCH_BATCH_SIZE):
+            try:
+                items = _fetch_html_parts(mail, batch, from_address, parsed_cache)
+            except Exception as e:
+                print(f"Error fetching emails {batch[0].decode()}-{batch[-1].decode()}: {e}")
+                continue
+            if items:
+                out_queue.put(items)
+    finally:
+        out_queue.put(None)
+
+def _process_email(cache_key, payload, encoding, charset, parsed_cache):
+    """Decode the HTML part of one scholar alert and parse its papers.
+
+    Returns (cache_key, papers). Alerts without a Message-ID are keyed by an
+    xxh3 hash of their HTML; already cached alerts are not re-parsed.
+    The key is None when there was nothing to parse, so that is not cached.
+    """
+    if cache_key in parsed_cache:
+        return cache_key, parsed_cache[cache_key]["papers"]
+    if not payload:
+        return None, []
+    html_content = _decode_part(payload, encoding, charset)
+    if not html_content:
+        return None, []
+    if cache_key is None:
+        # Hash all of it: the start of every alert is the same head/CSS boilerplate
+        cache_key = get_xxh3(html_content)
+        if cache_key in parsed_cache:
+            return cache_key, parsed_cache[cache_key]["papers"]
+    return cache_key, parse_scholar_email(html_content)
+
 def fetch_emails(
     email_user,
     email_pass,
@@ -208,6 +556,8 @@ def fetch_emails(
     mark_seen=True,
     from_address='scholaralerts-noreply@google.com',
     max_emails=2000,
+    cache_path=_DEFAULT_CACHE_PATH,
+    processed_path=_DEFAULT_PROCESSED_PATH,
 ):
     if not email_user or not email_pass:
         print("Email credentials (EMAIL_ACCOUNT, EMAIL_APP_PASSWORD) not set. Skipping Google Scholar fetch.")
@@ -223,6 +573,10 @@ def fetch_emails(
             print(f"IMAP select failed: {typ} (mailbox={mailbox})")
             mail.logout()
             return
+        # UIDs are only stable within one mailbox while UIDVALIDITY is unchanged
+        _, uidvalidity = mail.response('UIDVALIDITY')
+        uidvalidity = uidvalidity[0].decode() if uidvalidity and uidvalidity[0] else ""
+        uid_prefix = f"{email_user}/{mailbox}/{uidvalidity}/"
         
         if date:
             since_date = date
@@ -234,7 +588,7 @@ def fetch_emails(
         data = None
         criteria = _build_search_criteria(since_date, before_date, from_address, use_header_from=False)
         print(f"Searching emails with criteria: {' '.join(criteria)}")
-        typ, data = mail.search(None, *criteria)
+        typ, data = mail.uid('SEARCH', *criteria)
 
         if typ != "OK":
             data = None
@@ -244,7 +598,7 @@ def fetch_emails(
         if data is None:
             criteria2 = _build_search_criteria(since_date, before_date, from_address, use_header_from=True)
             print(f"Searching emails with criteria: {' '.join(criteria2)}")
-            typ2, data2 = mail.search(None, *criteria2)
+            typ2, data2 = mail.uid('SEARCH', *criteria2)
             if typ2 == "OK" and data2 and data2[0]:
                 data = data2
 
@@ -252,9 +606,9 @@ def fetch_emails(
             criteria3 = _build_date_only_criteria(since_date, before_date)
             print(f"Searching emails with criteria: {' '.join(criteria3) if criteria3 else 'ALL'}")
             if criteria3:
-                typ3, data3 = mail.search(None, *criteria3)
+                typ3, data3 = mail.uid('SEARCH', *criteria3)
             else:
-                typ3, data3 = mail.search(None, "ALL")
+                typ3, data3 = mail.uid('SEARCH', "ALL")
             if typ3 != "OK" or not data3 or not data3[0]:
                 print(f"IMAP search failed: {typ3}")
                 mail.close()
@@ -264,56 +618,94 @@ def fetch_emails(
 
         all_papers = []
         msg_ids = data[0].split()
+
+        # SINCE is date-granular, so skip alerts whose papers an earlier run
+        # already wrote out (and that are still there) before fetching
+        output_path = os.path.abspath(save_path)
+        uid_keys = {uid: f"{uid_prefix}{uid.decode()}" for uid in msg_ids}
+        processed = _load_processed_uids(processed_path)
+        # Entries for UIDs this search no longer returns are dropped
+        processed = {uid_keys[uid]: processed[uid_keys[uid]] for uid in msg_ids if uid_keys[uid] in processed}
+        if processed:
+            saved_ids_by_path = {}
+            to_fetch = [uid for uid in msg_ids
+                        if not _already_saved(processed.get(uid_keys[uid]), saved_ids_by_path)]
+            if len(to_fetch) < len(msg_ids):
+                print(f"Skipping {len(msg_ids) - len(to_fetch)} emails already saved on earlier runs.")
+            msg_ids = to_fetch
+            if not msg_ids:
+                print("No new emails.")
+                mail.close()
+                mail.logout()
+                return
+
         if max_emails and len(msg_ids) > int(max_emails):
             msg_ids = msg_ids[-int(max_emails):]
         print(f"Found {len(msg_ids)} emails.")
         
-        for num in msg_ids:
-            try:
-                typ, msg_data = mail.fetch(num, '(RFC822)')
-                if typ != "OK" or not msg_data or not msg_data[0]:
-                    continue
-                raw_email = msg_data[0][1]
-                msg = email.message_from_bytes(raw_email)
+        # The cache is only read while the fetch/parse threads run; the alerts
+        # seen in this run are collected separately and merged in afterwards.
+        parsed_cache = _load_parsed_cache(cache_path)
+        run_cache_entries = {}
+
+        # IMAP fetches run on a single producer thread (imaplib connections are
+        # not safe for concurrent commands) while a pool parses fetched emails.
+        fetch_queue = queue.Queue(maxsize=_FETCH_QUEUE_SIZE)
+        pending = []
+        with ThreadPoolExecutor(max_workers=1) as fetcher, \
+                ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as parser:
+            fetch_future = fetcher.submit(_fetch_batches, mail, msg_ids, from_address, parsed_cache, fetch_queue)
+            while (items := fetch_queue.get()) is not None:
+                for uid, *email_part in items:
+                    pending.append((uid, parser.submit(_process_email, *email_part, parsed_cache)))
+            fetch_future.result()
 
-                if not _is_target_sender(msg, from_address):
+            seen_uids = []
+            for uid, future in pending:
+                try:
+                    cache_key, papers = future.result()
+                except Exception as e:
+                    print(f"Error parsing email {uid.decode()}: {e}")
                     continue
-                
-                html_content = ""
-                if msg.is_multipart():
-                    for part in msg.walk():
-                        if part.get_content_type() == "text/html":
-                            payload = part.get_payload(decode=True)
-                            if payload:
-                                html_content = payload.decode(errors='ignore')
-                            break
-                else:
-                    if msg.get_content_type() == "text/html":
-                        payload = msg.get_payload(decode=True)
-                        if payload:
-                            html_content = payload.decode(errors='ignore')
-                
-                if html_content:
-                    papers = parse_scholar_email(html_content)
-                    msg_id = num.decode() if isinstance(num, (bytes, bytearray)) else str(num)
-                    print(f"Parsed {len(papers)} papers from email {msg_id}.")
-                    if papers:
-                        all_papers.extend(papers)
-                
-                if mark_seen:
-                    try:
-                        mail.store(num, "+FLAGS", "\\Seen")
-                    except Exception:
-                        pass
-            except Exception as e:
-                print(f"Error parsing email {num}: {e}")
-                continue
+                if cache_key:
+                    run_cache_entries[cache_key] = papers
+                print(f"Parsed {len(papers)} papers from email {uid.decode()}.")
+                all_papers.extend(papers)
+                seen_uids.append(uid)
+                processed[uid_keys[uid]] = {"output": output_path, "ids": [paper["id"] for paper in papers]}
+
+        if mark_seen:
+            for batch in itertools.batched(seen_uids, _FETCH_BATCH_SIZE):
+                try:
+                    mail.uid('STORE', b','.join(batch), "+FLAGS", "\\Seen")
+                except Exception:
+                    pass
                 
         mail.close()
         mail.logout()
+
+        # Re-stamp the alerts seen now and drop the ones that have not been
+        # seen for a while, i.e. that have left the SINCE window
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        cutoff = (today - datetime.timedelta(days=_PARSED_CACHE_MAX_AGE_DAYS)).isoformat()
+        updated_cache = {key: entry for key, entry in parsed_cache.items() if entry.get("parsed_at", "") >= cutoff}
+        for key, papers in run_cache_entries.items():
+            updated_cache[key] = {"parsed_at": today.isoformat(), "papers": papers}
+        if updated_cache != parsed_cache:
+            _save_parsed_cache(cache_path, updated_cache)
+
+        # The same paper often shows up in several alerts
+        seen_ids = set()
+        unique_papers = []
+        for paper in all_papers:
+            if paper["id"] not in seen_ids:
+                seen_ids.add(paper["id"])
+                unique_papers.append(paper)
+        all_papers = unique_papers
         
         if not all_papers:
             print("No papers extracted from emails.")
+            _save_processed_uids(processed_path, processed)
             return
 
         print(f"Total papers found from Google Scholar emails: {len(all_papers)}")
@@ -329,23 +721,27 @@ def fetch_emails(
         
         # Check if file exists and ends with newline
         start_newline = False
-        if os.path.exists(save_path):
-            with open(save_path, 'rb') as f:
-                try:
-                    f.seek(-1, 2)
-                    last = f.read(1)
-                    if last != b'\n':
-                        start_newline = True
-                except OSError:
-                    pass # Empty file
-
-        with open(save_path, 'a', encoding='utf-8') as f:
+        try:
+            size = os.stat(save_path).st_size
+        except FileNotFoundError:
+            size = 0
+        if size:
+            fd = os.open(save_path, os.O_RDONLY)
+            try:
+                start_newline = os.pread(fd, 1, size - 1) != b'\n'
+            finally:
+                os.close(fd)
+
+        # orjson emits UTF-8 bytes directly (non-ASCII kept as-is, like ensure_ascii=False)
+        with open(save_path, 'ab', buffering=1 << 20) as f:
             if start_newline:
-                f.write('\n')
+                f.write(b'\n')
             for paper in all_papers:
-                f.write(json.dumps(paper, ensure_ascii=False) + '\n')
+                f.write(orjson.dumps(paper, option=orjson.OPT_APPEND_NEWLINE))
         
         print(f"Saved Scholar papers to {save_path}")
+        # Only recorded once the papers are safely written
+        _save_processed_uids(processed_path, processed)
                 
     except Exception as e:
         print(f"Error fetching emails: {e}")
@@ -365,6 +761,8 @@ if __name__ == "__main__":
     parser.add_argument("--since-days", default=os.environ.get("EMAIL_SINCE_DAYS", "1"))
     parser.add_argument("--mark-seen", default=os.environ.get("EMAIL_MARK_SEEN", "1"))
     parser.add_argument("--max-emails", default=os.environ.get("EMAIL_MAX_EMAILS", "2000"))
+    parser.add_argument("--cache-path", default=os.environ.get("SCHOLAR_CACHE_PATH", _DEFAULT_CACHE_PATH))
+    parser.add_argument("--processed-path", default=os.environ.get("SCHOLAR_PROCESSED_PATH", _DEFAULT_PROCESSED_PATH))
     args = parser.parse_args()
 
     email_user = os.environ.get("EMAIL_ACCOUNT")
@@ -395,4 +793,6 @@ if __name__ == "__main__":
         mark_seen=str(args.mark_seen).strip() not in ("0", "false", "False", "no", "No"),
         from_address=args.from_address,
         max_emails=int(args.max_emails) if str(args.max_emails).strip() else 2000,
+        cache_path=args.cache_path or None,
+        processed_path=args.processed_path or None,
     )
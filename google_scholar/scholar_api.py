@@ -2,12 +2,29 @@ import os
 import json
 import logging
 import time
-from serpapi import GoogleSearch
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Concurrent SerpApi requests; each call is an independent HTTPS round-trip
+MAX_WORKERS = 8
+
+# Summaries at least this long are kept as-is, so the search is skipped
+MIN_SUMMARY_LENGTH = 200
+
+SERPAPI_SEARCH_URL = "https://serpapi.com/search.json"
+REQUEST_TIMEOUT = 15
+
+# One keep-alive connection pool shared by all workers, so the TLS handshake
+# to SerpApi is paid once per connection instead of once per paper
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
+
 def enhance_paper_with_scholar(paper_data):
     """
     Enhance a single paper data using Google Scholar API via SerpApi.
@@ -38,8 +55,8 @@ def enhance_paper_with_scholar(paper_data):
     }
 
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        response = _SESSION.get(SERPAPI_SEARCH_URL, params=params, timeout=REQUEST_TIMEOUT)
+        results = response.json()
         
         if "error" in results:
             logger.error(f"SerpApi error: {results['error']}")
@@ -92,17 +109,30 @@ def enhance_paper_with_scholar(paper_data):
         
     return paper_data
 
-def enhance_papers_batch(papers):
+def needs_enhancement(paper_data):
     """
-    Enhance a list of papers.
+    Whether a paper's summary is short or a placeholder, i.e. worth a SerpApi search.
     """
-    enhanced_papers = []
-    for paper in papers:
-        # Respect rate limits if necessary, though SerpApi handles some queuing.
-        # Adding a small delay to be safe and polite if processing many.
-        enhanced = enhance_paper_with_scholar(paper)
-        enhanced_papers.append(enhanced)
-        # time.sleep(0.5) 
+    summary = paper_data.get("summary", "")
+    return len(summary) < MIN_SUMMARY_LENGTH or "Abstract not available" in summary
+
+def enhance_papers_batch(papers, max_workers=MAX_WORKERS):
+    """
+    Enhance a list of papers, querying SerpApi for up to max_workers papers at a time.
+    
+    Papers that already have a substantial summary are passed through unchanged.
+    Returns the papers in the same order as the input.
+    """
+    pending = [i for i, paper in enumerate(papers) if needs_enhancement(paper)]
+    if not pending:
+        return list(papers)
+    logger.info(f"Enhancing {len(pending)} of {len(papers)} papers; the rest already have abstracts.")
+
+    enhanced_papers = list(papers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(enhance_paper_with_scholar, (papers[i] for i in pending))
+        for i, enhanced in zip(pending, results):
+            enhanced_papers[i] = enhanced
     return enhanced_papers
 
 # enhance_papers_batch([{"title": "An optimizing spatial learned index for balanced update and query performance"}])
\ No newline at end of file
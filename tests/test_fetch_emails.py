@@ -0,0 +1,125 @@
+import base64
+
+import orjson
+
+from google_scholar.fetch_emails import (
+    _already_saved,
+    _body_item,
+    _decode_part,
+    _find_html_part,
+    _parse_fetch_response,
+)
+
+FROM_HEADER = b'From: Google Scholar Alerts <scholaralerts-noreply@google.com>\r\n\r\n'
+HTML_PART = b'("TEXT" "HTML" ("CHARSET" "UTF-8") NIL NIL "QUOTED-PRINTABLE" 5678 100 NIL NIL NIL)'
+PLAIN_PART = b'("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "BASE64" 1234 16 NIL NIL NIL)'
+ALTERNATIVE = b'(' + PLAIN_PART + HTML_PART + b' "ALTERNATIVE" ("BOUNDARY" "000") NIL NIL)'
+
+
+def test_alternative_with_from_header():
+    msg_data = [
+        (b'1 (UID 100 BODYSTRUCTURE ' + ALTERNATIVE + b' BODY[HEADER.FIELDS (FROM)] {%d}' % len(FROM_HEADER),
+         FROM_HEADER),
+        b')',
+    ]
+    attrs = _parse_fetch_response(msg_data)[b'100']
+    assert _body_item(attrs) == FROM_HEADER
+    assert _find_html_part(attrs[b'BODYSTRUCTURE']) == ("2", b'QUOTED-PRINTABLE', b'UTF-8')
+
+
+def test_gmail_style_quoted_header_fields():
+    header = FROM_HEADER.replace(b'\r\n\r\n', b'\r\nMessage-ID: <a@b>\r\n\r\n')
+    msg_data = [
+        (b'7 (UID 321 BODYSTRUCTURE ' + ALTERNATIVE
+         + b' BODY[HEADER.FIELDS ("FROM" "MESSAGE-ID")] {%d}' % len(header), header),
+        b')',
+    ]
+    attrs = _parse_fetch_response(msg_data)[b'321']
+    assert b'BODY[HEADER.FIELDS ("FROM" "MESSAGE-ID")]' in attrs
+    assert _body_item(attrs) == header
+
+
+def test_literal_inside_bodystructure():
+    msg_data = [
+        (b'1 (UID 5 BODYSTRUCTURE ((' + PLAIN_PART + HTML_PART + b' "ALTERNATIVE")'
+         b'("APPLICATION" "PDF" ("NAME" {9}', b'paper.pdf'),
+        (b') NIL NIL "BASE64" 100 NIL NIL NIL) "MIXED" NIL NIL NIL) BODY[HEADER.FIELDS (FROM)] {%d}'
+         % len(FROM_HEADER), FROM_HEADER),
+        b')',
+    ]
+    attrs = _parse_fetch_response(msg_data)[b'5']
+    assert attrs[b'BODYSTRUCTURE'][1][2] == [b'NAME', b'paper.pdf']
+    assert _body_item(attrs) == FROM_HEADER
+    # Nested multipart: the HTML part sits inside the first (alternative) part
+    assert _find_html_part(attrs[b'BODYSTRUCTURE'])[0] == "1.2"
+
+
+def test_uid_after_body_literal():
+    body = b'<html>hi</html>'
+    msg_data = [
+        (b'3 (BODY[2] {%d}' % len(body), body),
+        b' UID 42 FLAGS (\\Seen))',
+    ]
+    attrs = _parse_fetch_response(msg_data)[b'42']
+    assert _body_item(attrs) == body
+    assert attrs[b'FLAGS'] == [b'\\Seen']
+
+
+def test_multiple_messages_in_one_response():
+    msg_data = []
+    for uid in (b'10', b'11'):
+        msg_data.append((b'1 (UID ' + uid + b' BODY[2] {2}', uid))
+        msg_data.append(b')')
+    parsed = _parse_fetch_response(msg_data)
+    assert list(parsed) == [b'10', b'11']
+    assert [_body_item(attrs) for attrs in parsed.values()] == [b'10', b'11']
+
+
+def test_single_part_uses_text_section():
+    structure = _parse_fetch_response([b'1 (UID 9 BODYSTRUCTURE ' + HTML_PART.replace(b'UTF-8', b'utf-8') + b')'])
+    assert _find_html_part(structure[b'9'][b'BODYSTRUCTURE']) == ("TEXT", b'QUOTED-PRINTABLE', b'utf-8')
+
+
+def test_no_html_part():
+    structure = _parse_fetch_response([b'1 (UID 9 BODYSTRUCTURE ' + PLAIN_PART + b')'])
+    assert _find_html_part(structure[b'9'][b'BODYSTRUCTURE']) is None
+
+
+def test_decode_part_encodings():
+    html = '<p>学术 alert</p>'
+    assert _decode_part(base64.b64encode(html.encode('utf-8')), b'BASE64', b'UTF-8') == html
+    assert _decode_part(b'<p>=E5=AD=A6=E6=9C=AF alert</p>', b'QUOTED-PRINTABLE', None) == html
+    assert _decode_part(html.encode('gb2312'), b'8BIT', b'GB2312') == html
+
+
+def _write_papers(path, ids):
+    path.write_bytes(b''.join(orjson.dumps({"id": i}) + b'\n' for i in ids))
+
+
+def test_already_saved_same_file_kept(tmp_path):
+    today = tmp_path / "2026-10-15.jsonl"
+    _write_papers(today, ["a", "b", "c"])
+    entry = {"output": str(today), "ids": ["a", "b"]}
+    assert _already_saved(entry, {})
+
+
+def test_already_saved_same_file_deleted(tmp_path):
+    today = tmp_path / "2026-10-15.jsonl"
+    _write_papers(today, ["a", "b"])
+    entry = {"output": str(today), "ids": ["a", "b"]}
+    today.unlink()
+    assert not _already_saved(entry, {})
+    # A regenerated file without the alert's papers doesn't count either
+    _write_papers(today, ["c"])
+    assert not _already_saved(entry, {})
+
+
+def test_already_saved_earlier_day_file(tmp_path):
+    yesterday = tmp_path / "2026-10-14.jsonl"
+    _write_papers(yesterday, ["a", "b"])
+    (tmp_path / "2026-10-15.jsonl").touch()
+    saved_ids_by_path = {}
+    assert _already_saved({"output": str(yesterday), "ids": ["a"]}, saved_ids_by_path)
+    assert _already_saved({"output": str(yesterday), "ids": ["b"]}, saved_ids_by_path)
+    assert saved_ids_by_path == {str(yesterday): {"a", "b"}}
+    assert not _already_saved(None, saved_ids_by_path)